@@ -1,8 +1,48 @@
 import pandas as pd
 import numpy as np
 import json
+import math
 import time
 import ast
+import re
+import warnings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+def to_plain_json(value):
+    """Turn numpy scalars into Python values and NaN/inf into None, like orjson does"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        value = value.tolist()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {(key.item() if isinstance(key, np.generic) else key): to_plain_json(val)
+                for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain_json(val) for val in value]
+    return value
+
+def save_json(data, file_path):
+    """Write results as indented JSON, using orjson when it's installed"""
+    if orjson is not None:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        with open(file_path, 'wb') as output_file:
+            output_file.write(orjson.dumps(data, default=str, option=options))
+    else:
+        with open(file_path, 'w') as output_file:
+            json.dump(to_plain_json(data), output_file, indent=2, default=str)
+
+# cells that look like a dict literal, allowing leading whitespace
+DICT_START = re.compile(r'^\s*\{')
 
 class PandasHelper:
     def __init__(self):
@@ -10,18 +50,62 @@ class PandasHelper:
 
     def parse_if_json_like(self, val):
         """Try to parse text like a dictionary (e.g., delivery_by_region)"""
+        try:
+            # most blobs are plain JSON, which json.loads handles much faster
+            return json.loads(val)
+        except:
+            pass
         try:
             return ast.literal_eval(val)
         except:
             return val
 
+    def find_dict_sample(self, column, how_many=5):
+        """Return the first dict in the few rows from the first non-empty value on, or None"""
+        start = column.first_valid_index()
+        if start is None:
+            return None
+        for val in column.loc[start:].head(how_many):
+            if isinstance(val, dict):
+                return val
+        return None
+
+    def read_with_arrow(self, file_path):
+        """Multithreaded Arrow read that keeps date and time columns as their text"""
+        # the schema Arrow infers from the first block shows which columns it
+        # would turn into dates/times; read those as plain strings instead
+        with pa_csv.open_csv(file_path) as reader:
+            text_types = {field.name: pa.string() for field in reader.schema
+                          if pa.types.is_temporal(field.type)}
+        convert_options = pa_csv.ConvertOptions(column_types=text_types, strings_can_be_null=True)
+        table = pa_csv.read_csv(file_path, convert_options=convert_options)
+        # all-empty columns come out as float NaN, same as the C parser
+        null_cols = [field.name for field in table.schema if pa.types.is_null(field.type)]
+        for col in null_cols:
+            index = table.schema.get_field_index(col)
+            table = table.set_column(index, col, table.column(col).cast(pa.float64()))
+        return table.to_pandas()
+
     def load_my_csv(self, file_path):
         """Load CSV with pandas and parse JSON-like columns"""
         try:
-            df = pd.read_csv(file_path)
+            df = None
+            if pa is not None:
+                try:
+                    df = self.read_with_arrow(file_path)
+                except pa.ArrowInvalid:
+                    # e.g. newlines inside quoted text, which Arrow rejects
+                    df = None
+            if df is None:
+                df = pd.read_csv(file_path)
             for col in df.columns:
-                if df[col].dtype == 'object' and df[col].str.startswith('{').any():
-                    df[col] = df[col].apply(lambda x: self.parse_if_json_like(x) if isinstance(x, str) else x)
+                # the .str accessor needs a column of actual strings
+                if df[col].dtype == 'object' and pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+                    # only the cells that look like dicts need parsing
+                    mask = df[col].str.match(DICT_START, na=False)
+                    if mask.any():
+                        dict_like = df.loc[mask, col].tolist()
+                        df.loc[mask, col] = [self.parse_if_json_like(v) for v in dict_like]
             print(f"Loaded {len(df)} rows and {len(df.columns)} columns")
             return df
         except FileNotFoundError:
@@ -31,6 +115,48 @@ class PandasHelper:
             print(f"Something went wrong: {error}")
             return pd.DataFrame()
 
+    def numeric_block_stats(self, df, numeric_cols):
+        """Summary stats for all numeric columns, computed on one 2-D NumPy block"""
+        if not numeric_cols:
+            return {}
+
+        block = np.ascontiguousarray(df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan))
+
+        # all-empty columns just come out as NaN, no need to warn about them
+        with warnings.catch_warnings(), np.errstate(all='ignore'):
+            warnings.simplefilter('ignore', RuntimeWarning)
+            counts = (~np.isnan(block)).sum(axis=0)
+            means = np.nanmean(block, axis=0)
+            q1s, medians, q3s = np.nanquantile(block, [0.25, 0.5, 0.75], axis=0)
+
+            # bias-corrected skew and excess kurtosis, same formulas as pandas
+            diffs = block - means
+            m2 = np.nansum(diffs ** 2, axis=0)
+            m3 = np.nansum(diffs ** 3, axis=0)
+            m4 = np.nansum(diffs ** 4, axis=0)
+            skews = (counts * (counts - 1) ** 0.5 / (counts - 2)) * (m3 / m2 ** 1.5)
+            kurts = ((counts * (counts + 1) * (counts - 1) * m4) / ((counts - 2) * (counts - 3) * m2 ** 2)
+                     - 3 * (counts - 1) ** 2 / ((counts - 2) * (counts - 3)))
+            skews = np.where(counts < 3, np.nan, np.where(m2 == 0, 0.0, skews))
+            kurts = np.where(counts < 4, np.nan, np.where(m2 == 0, 0.0, kurts))
+
+            stat_arrays = {
+                'mean_value': means,
+                'std_dev': np.nanstd(block, axis=0, ddof=1),
+                'min_value': np.nanmin(block, axis=0),
+                'max_value': np.nanmax(block, axis=0),
+                'q1': q1s,
+                'median': medians,
+                'q3': q3s,
+                'skew': skews,
+                'kurt': kurts
+            }
+
+        return {
+            col: {name: values[i] for name, values in stat_arrays.items()}
+            for i, col in enumerate(numeric_cols)
+        }
+
     def examine_dataset(self, df, dataset_name):
         if df.empty:
             return {'error': 'Dataset is empty!'}
@@ -41,68 +167,71 @@ class PandasHelper:
             'dataset_name': dataset_name,
             'row_count': len(df),
             'col_count': len(df.columns),
-            'memory_size': df.memory_usage(deep=True).sum(),
+            # shallow size: deep=True would walk every Python string object
+            'memory_size': df.memory_usage(deep=False).sum(),
             'all_columns': df.columns.tolist()
         }
 
         col_details = {}
 
+        # work out the per-column stats for the whole frame up front
+        row_total = len(df)
+        null_counts = df.isnull().sum()
+        numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        number_stats = self.numeric_block_stats(df, numeric_cols)
+
         for col in df.columns:
             current_col = df[col]
 
             col_stats = {
                 'column_name': col,
                 'data_type': str(current_col.dtype),
-                'total_count': len(current_col),
-                'not_empty': current_col.count(),
-                'empty_count': current_col.isnull().sum(),
-                'percent_missing': (current_col.isnull().sum() / len(current_col)) * 100
+                'total_count': row_total,
+                'not_empty': row_total - null_counts[col],
+                'empty_count': null_counts[col],
+                'percent_missing': (null_counts[col] / row_total) * 100
             }
 
-            if pd.api.types.is_numeric_dtype(current_col):
-                num_summary = current_col.describe()
-                def get_safe(summary, key):
-                    return summary[key] if key in summary else None
+            is_number_col = pd.api.types.is_numeric_dtype(current_col)
+            dict_sample = None if is_number_col else self.find_dict_sample(current_col)
 
+            if is_number_col:
                 col_stats.update({
                     'type': 'numeric',
-                    'mean_value': get_safe(num_summary, 'mean'),
-                    'std_dev': get_safe(num_summary, 'std'),
-                    'min_value': get_safe(num_summary, 'min'),
-                    'max_value': get_safe(num_summary, 'max'),
-                    'q1': get_safe(num_summary, '25%'),
-                    'median': get_safe(num_summary, '50%'),
-                    'q3': get_safe(num_summary, '75%'),
-                    'skew': current_col.skew(),
-                    'kurt': current_col.kurtosis()
-                })
-
-            elif current_col.apply(lambda x: isinstance(x, dict)).any():
-                sample = current_col.dropna().iloc[0]
-                col_stats.update({
-                    'type': 'dict-like',
-                    'sample_keys': list(sample.keys()) if isinstance(sample, dict) else [],
-                    'example': sample
+                    **number_stats[col]
                 })
 
-            else:
+            elif dict_sample is None:
+                # one hashing pass; its length doubles as the unique count
                 freq_counts = current_col.value_counts()
+                if freq_counts.index.inferred_type == 'mixed':
+                    # parsed dicts further down than the sample looked; mixed
+                    # numbers and text from the C parser stay categorical
+                    dict_sample = next((val for val in freq_counts.index if isinstance(val, dict)), None)
+                if dict_sample is None:
+                    col_stats.update({
+                        'type': 'categorical',
+                        'unique_vals': len(freq_counts),
+                        'top_value': freq_counts.index[0] if len(freq_counts) > 0 else None,
+                        'top_count': freq_counts.iloc[0] if len(freq_counts) > 0 else 0,
+                        'freq_top5': freq_counts.head().to_dict()
+                    })
+
+            if dict_sample is not None:
                 col_stats.update({
-                    'type': 'categorical',
-                    'unique_vals': current_col.nunique(),
-                    'top_value': freq_counts.index[0] if len(freq_counts) > 0 else None,
-                    'top_count': freq_counts.iloc[0] if len(freq_counts) > 0 else 0,
-                    'freq_top5': freq_counts.head().to_dict()
+                    'type': 'dict-like',
+                    'sample_keys': list(dict_sample.keys()),
+                    'example': dict_sample
                 })
 
             col_details[col] = col_stats
 
-        total_cells = len(df) * len(df.columns)
-        missing_cells = df.isnull().sum().sum()
+        total_cells = row_total * len(df.columns)
+        missing_cells = null_counts.sum()
 
         quality_check = {
             'data_completeness': ((total_cells - missing_cells) / total_cells) * 100,
-            'cols_with_missing': df.isnull().any().sum(),
+            'cols_with_missing': (null_counts > 0).sum(),
             'total_missing': missing_cells
         }
 
@@ -115,6 +244,15 @@ class PandasHelper:
             'processing_time': timer_end - timer_start
         }
 
+    def make_columns_contiguous(self, df):
+        """Return df with every numeric column backed by a C-contiguous array"""
+        fixed_cols = {}
+        for col in df.select_dtypes(include=[np.number]).columns:
+            values = df[col].to_numpy()
+            if not values.flags.c_contiguous:
+                fixed_cols[col] = np.ascontiguousarray(values)
+        return df.assign(**fixed_cols) if fixed_cols else df
+
     def do_groupby_stuff(self, df, group_columns):
         if df.empty or not group_columns:
             return {}
@@ -124,30 +262,35 @@ class PandasHelper:
             if missing:
                 return {'error': f'These columns are missing: {missing}'}
 
+            df = self.make_columns_contiguous(df)
             grouped_data = df.groupby(group_columns)
+            group_sizes = grouped_data.size()
 
             group_info = {
                 'num_groups': grouped_data.ngroups,
-                'group_size_stats': grouped_data.size().describe().to_dict(),
-                'smallest_group': grouped_data.size().min(),
-                'largest_group': grouped_data.size().max(),
-                'average_group_size': grouped_data.size().mean()
+                'group_size_stats': group_sizes.describe().to_dict(),
+                'smallest_group': group_sizes.min(),
+                'largest_group': group_sizes.max(),
+                'average_group_size': group_sizes.mean()
             }
 
-            number_cols = df.select_dtypes(include=[np.number]).columns
+            number_cols = [col for col in df.select_dtypes(include=[np.number]).columns
+                           if col not in group_columns]
             number_group_analysis = {}
-            for num_col in number_cols:
-                if num_col not in group_columns:
-                    try:
-                        group_stats = grouped_data[num_col].agg(['count', 'mean', 'std', 'min', 'max'])
+            if number_cols:
+                try:
+                    # one groupby pass for every numeric column at once
+                    group_stats = grouped_data[number_cols].agg(['count', 'mean', 'std', 'min', 'max'])
+                    for num_col in number_cols:
+                        group_means = group_stats[(num_col, 'mean')]
                         number_group_analysis[num_col] = {
-                            'avg_of_means': group_stats['mean'].mean(),
-                            'std_of_means': group_stats['mean'].std(),
-                            'lowest_group_mean': group_stats['mean'].min(),
-                            'highest_group_mean': group_stats['mean'].max()
+                            'avg_of_means': group_means.mean(),
+                            'std_of_means': group_means.std(),
+                            'lowest_group_mean': group_means.min(),
+                            'highest_group_mean': group_means.max()
                         }
-                    except:
-                        continue
+                except:
+                    pass
 
             group_info['number_analysis'] = number_group_analysis
 
@@ -162,7 +305,7 @@ class PandasHelper:
         print(f"{'='*55}")
         print(f"Rows: {analysis['basic_stuff']['row_count']:,}")
         print(f"Columns: {analysis['basic_stuff']['col_count']}")
-        print(f"Memory: {analysis['basic_stuff']['memory_size']:,} bytes")
+        print(f"Memory (shallow): {analysis['basic_stuff']['memory_size']:,} bytes")
         print(f"Time to analyze: {analysis['processing_time']:.2f} seconds")
         print(f"Data quality: {analysis['quality_check']['data_completeness']:.1f}% complete")
 
@@ -241,26 +384,18 @@ def run_analysis():
                         print(f"Unique page-ad combinations: {combo_analysis['num_groups']}")
                         print(f"Average records per combo: {combo_analysis['average_group_size']:.1f}")
 
-    with open('pandas_student_results.json', 'w') as output_file:
-        json_friendly = {}
-        for dataset, analysis in all_my_results.items():
-            json_friendly[dataset] = {
-                'basic_stuff': analysis['basic_stuff'],
-                'processing_time': analysis['processing_time'],
-                'quality_check': analysis['quality_check'],
-                'column_summary': {
-                    col: {
-                        k: (
-                            v if pd.api.types.is_scalar(v) and not pd.isna(v)
-                            else str(v)
-                        )
-                        for k, v in details.items()
-                        if k != 'freq_top5'
-                    }
-                    for col, details in analysis['col_details'].items()
-                }
+    json_friendly = {}
+    for dataset, analysis in all_my_results.items():
+        json_friendly[dataset] = {
+            'basic_stuff': analysis['basic_stuff'],
+            'processing_time': analysis['processing_time'],
+            'quality_check': analysis['quality_check'],
+            'column_summary': {
+                col: {k: v for k, v in details.items() if k != 'freq_top5'}
+                for col, details in analysis['col_details'].items()
             }
-        json.dump(json_friendly, output_file, indent=2, default=str)
+        }
+    save_json(json_friendly, 'pandas_student_results.json')
 
     print(f"\n{'='*55}")
     print("Pandas analysis finished! Saved to pandas_student_results.json")
@@ -1,11 +1,58 @@
 import polars as pl
 import json
+import math
 import time
 import ast
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def to_plain_json(value):
+    """Turn NaN/inf into None, the way orjson writes them"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: to_plain_json(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain_json(val) for val in value]
+    return value
+
+def save_json(data, file_path):
+    """Write results as indented JSON, using orjson when it's installed"""
+    if orjson is not None:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, default=str, option=options))
+    else:
+        with open(file_path, 'w') as f:
+            json.dump(to_plain_json(data), f, indent=2, default=str)
+
+NUMBER_STAT_NAMES = ['avg', 'std_dev', 'minimum', 'maximum', 'middle', 'q1', 'q3']
+
+# Text columns with at least this share of distinct values skip the frequency table
+NEAR_UNIQUE_SHARE = 0.95
+
 class PolarsAnalyzer:
-    def __init__(self):
+    def __init__(self, exact_unique=False):
         self.my_data_files = {}
+        # False: estimate distinct counts first and skip value counting on id-like columns
+        self.exact_unique = exact_unique
+
+    def number_stat_exprs(self, col_name):
+        """Summary stat expressions for one numeric column, named '<column>__<stat>'"""
+        col = pl.col(col_name)
+        stat_exprs = [
+            col.mean(),
+            col.std(),
+            col.min(),
+            col.max(),
+            col.median(),
+            col.quantile(0.25),
+            col.quantile(0.75)
+        ]
+        return [expr.alias(f'{col_name}__{name}') for name, expr in zip(NUMBER_STAT_NAMES, stat_exprs)]
 
     def read_csv_with_polars(self, file_path):
         """Load CSV using Polars - supposedly faster than pandas!"""
@@ -36,24 +83,47 @@ class PolarsAnalyzer:
             'column_list': df.columns
         }
 
+        # Null counts and numeric stats for every column in one lazy query
+        numeric_cols = [col for col in df.columns if df.schema[col].is_numeric()]
+        summary_exprs = [pl.col(col).null_count().alias(f'{col}__nulls') for col in df.columns]
+        summary_exprs += [expr for col in numeric_cols for expr in self.number_stat_exprs(col)]
+        try:
+            summary_row = df.lazy().select(summary_exprs).collect().row(0, named=True)
+        except:
+            # keep the null counts even if the numeric stats can't be computed
+            summary_row = {f'{col}__nulls': count for col, count in df.null_count().row(0, named=True).items()}
+        null_counts = {col: summary_row[f'{col}__nulls'] for col in df.columns}
+
+        # Distinct-count estimates for string columns, in their own query:
+        # approx_n_unique raises on categorical, list, struct and null columns
+        # and that shouldn't cost the numeric stats above
+        unique_estimates = {}
+        text_cols = [col for col in df.columns if df.schema[col] == pl.String]
+        if text_cols and not self.exact_unique:
+            try:
+                unique_estimates = df.select(pl.col(text_cols).approx_n_unique()).row(0, named=True)
+            except:
+                pass
+
         # Examine each column
         column_analysis = {}
 
         for col_name in df.columns:
-            col_data = df.select(col_name)
+            col_series = df[col_name]
 
             # Basic column info
             col_info = {
                 'column': col_name,
-                'data_type': str(df[col_name].dtype),
+                'data_type': str(col_series.dtype),
                 'total_rows': df.height,
-                'non_null_rows': df[col_name].count(),
-                'null_rows': df[col_name].null_count(),
-                'percent_null': (df[col_name].null_count() / df.height) * 100
+                'non_null_rows': df.height - null_counts[col_name],
+                'null_rows': null_counts[col_name],
+                'percent_null': (null_counts[col_name] / df.height) * 100
             }
 
             try:
-                sample_value = df[col_name].drop_nulls().to_list()[0]
+                sample_series = col_series.drop_nulls().head(1)
+                sample_value = sample_series.item() if sample_series.len() else None
                 if isinstance(sample_value, str):
                     try:
                         parsed_value = ast.literal_eval(sample_value)
@@ -71,18 +141,10 @@ class PolarsAnalyzer:
                 pass
 
             # Check if it's numeric or text
-            if df[col_name].dtype.is_numeric():
-                # Numeric column - calculate stats
+            if col_series.dtype.is_numeric():
+                # Numeric column - pick its stats out of the batched query
                 try:
-                    num_stats = df.select([
-                        pl.col(col_name).mean().alias('avg'),
-                        pl.col(col_name).std().alias('std_dev'),
-                        pl.col(col_name).min().alias('minimum'),
-                        pl.col(col_name).max().alias('maximum'),
-                        pl.col(col_name).median().alias('middle'),
-                        pl.col(col_name).quantile(0.25).alias('q1'),
-                        pl.col(col_name).quantile(0.75).alias('q3')
-                    ]).to_dicts()[0]
+                    num_stats = {name: summary_row[f'{col_name}__{name}'] for name in NUMBER_STAT_NAMES}
 
                     col_info.update({
                         'category': 'numbers',
@@ -97,18 +159,35 @@ class PolarsAnalyzer:
             else:
                 # Text/categorical column
                 try:
-                    freq_table = df[col_name].value_counts().sort('count', descending=True)
-                    unique_vals = df[col_name].n_unique()
+                    approx_unique = unique_estimates.get(col_name)
+                    if approx_unique is not None and approx_unique >= NEAR_UNIQUE_SHARE * df.height:
+                        # Almost every value is distinct (ids, urls), so the
+                        # frequency table would be huge and tell us nothing;
+                        # the estimate only decides that, the count is exact
+                        col_info.update({
+                            'category': 'text',
+                            'unique_count': col_series.n_unique(),
+                            'near_unique': True,
+                            'top_value': None,
+                            'top_frequency': None,
+                            'top_5_frequencies': None
+                        })
+                        column_analysis[col_name] = col_info
+                        continue
+
+                    # one hash pass gives both the distinct count and the top 5
+                    all_counts = col_series.value_counts(sort=True)
+                    unique_vals = all_counts.height
+                    freq_table = all_counts.head(5)
+                    top_values = freq_table[col_name].to_list()
+                    top_counts = freq_table['count'].to_list()
 
                     col_info.update({
                         'category': 'text',
                         'unique_count': unique_vals,
-                        'top_value': freq_table[col_name][0] if freq_table.height > 0 else None,
-                        'top_frequency': freq_table['count'][0] if freq_table.height > 0 else 0,
-                        'top_5_frequencies': {
-                            str(freq_table[col_name][i]): freq_table['count'][i] 
-                            for i in range(min(5, freq_table.height))
-                        }
+                        'top_value': top_values[0] if top_values else None,
+                        'top_frequency': top_counts[0] if top_counts else 0,
+                        'top_5_frequencies': dict(zip(map(str, top_values), top_counts))
                     })
                 except Exception as e:
                     col_info.update({
@@ -121,11 +200,11 @@ class PolarsAnalyzer:
 
         # Overall data quality
         total_possible_values = df.height * df.width
-        actual_null_values = sum(df[col].null_count() for col in df.columns)
+        actual_null_values = sum(null_counts.values())
 
         data_quality = {
             'completeness_percent': ((total_possible_values - actual_null_values) / total_possible_values) * 100,
-            'columns_with_nulls': sum(1 for col in df.columns if df[col].null_count() > 0),
+            'columns_with_nulls': sum(1 for count in null_counts.values() if count > 0),
             'total_null_count': actual_null_values
         }
 
@@ -168,25 +247,33 @@ class PolarsAnalyzer:
             if numeric_columns:
                 numeric_group_analysis = {}
                 
-                for num_col in numeric_columns:
-                    try:
-                        grouped_stats = df.group_by(grouping_cols).agg([
-                            pl.col(num_col).count().alias('count'),
-                            pl.col(num_col).mean().alias('mean'),
-                            pl.col(num_col).std().alias('std'),
-                            pl.col(num_col).min().alias('min'),
-                            pl.col(num_col).max().alias('max')
-                        ])
-                        
+                # One groupby for every numeric column, named '<column>__<stat>'
+                agg_exprs = [
+                    expr
+                    for num_col in numeric_columns
+                    for expr in (
+                        pl.col(num_col).count().alias(f'{num_col}__count'),
+                        pl.col(num_col).mean().alias(f'{num_col}__mean'),
+                        pl.col(num_col).std().alias(f'{num_col}__std'),
+                        pl.col(num_col).min().alias(f'{num_col}__min'),
+                        pl.col(num_col).max().alias(f'{num_col}__max')
+                    )
+                ]
+                
+                try:
+                    grouped_stats = df.group_by(grouping_cols).agg(agg_exprs)
+                    
+                    for num_col in numeric_columns:
+                        group_means = grouped_stats[f'{num_col}__mean']
                         numeric_group_analysis[num_col] = {
-                            'overall_mean': grouped_stats['mean'].mean(),
-                            'mean_variation': grouped_stats['mean'].std(),
-                            'lowest_group_mean': grouped_stats['mean'].min(),
-                            'highest_group_mean': grouped_stats['mean'].max(),
-                            'groups_with_data': grouped_stats['count'].filter(pl.col('count') > 0).height
+                            'overall_mean': group_means.mean(),
+                            'mean_variation': group_means.std(),
+                            'lowest_group_mean': group_means.min(),
+                            'highest_group_mean': group_means.max(),
+                            'groups_with_data': (grouped_stats[f'{num_col}__count'] > 0).sum()
                         }
-                    except Exception as e:
-                        numeric_group_analysis[num_col] = {'error': str(e)}
+                except Exception as e:
+                    numeric_group_analysis = {num_col: {'error': str(e)} for num_col in numeric_columns}
                 
                 group_summary['numeric_analysis'] = numeric_group_analysis
             
@@ -337,7 +424,7 @@ def run_polars_analysis():
         print("Saving results to polars_analysis_results.json...")
         print(f"{'='*60}")
         
-        # Make JSON-serializable
+        # Collect what goes into the JSON file
         json_results = {}
         for dataset_name, analysis in all_results.items():
             json_results[dataset_name] = {
@@ -345,15 +432,13 @@ def run_polars_analysis():
                 'analysis_time': analysis['analysis_time'],
                 'data_quality': analysis['data_quality'],
                 'column_summary': {
-                    col: {k: (v if isinstance(v, (int, float, str, bool, type(None))) else str(v))
-                          for k, v in info.items()
+                    col: {k: v for k, v in info.items()
                           if k not in ['top_5_frequencies']}  # Exclude complex nested dicts
                     for col, info in analysis['column_analysis'].items()
                 }
             }
         
-        with open('polars_analysis_results.json', 'w') as f:
-            json.dump(json_results, f, indent=2, default=str)
+        save_json(json_results, 'polars_analysis_results.json')
         
         print("Results saved successfully!")
         print(f"Analyzed {len(all_results)} datasets with Polars")
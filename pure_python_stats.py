@@ -1,222 +1,362 @@
 import csv
+import io
 import math
+import mmap
+import multiprocessing
+import os
+import sys
 import json
 import ast
-from collections import Counter, defaultdict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import mul
+from statistics import fmean
 import time
 
+# Only used to write the results file faster; the analysis itself sticks to
+# the standard library and the json module is used when orjson is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Read the CSV in big chunks instead of the default few-KB buffer
+READ_BUFFER_SIZE = 64 << 20
+
+def parse_nested_dict(row_val):
+    """Parse a dict stored as text, trying the much faster json parser first"""
+    try:
+        # the columns hold Python reprs, which are JSON once the quotes are swapped
+        return json.loads(row_val.replace("'", '"'))
+    except ValueError:
+        return ast.literal_eval(row_val)
+
+def unpack_delivery_by_region(row_val):
+    """Return (total_spend, total_impressions) over all regions"""
+    try:
+        parsed = parse_nested_dict(row_val)
+    except:
+        return 0, 0
+    spend, impressions = 0, 0
+    for region_data in parsed.values():
+        spend += region_data.get('spend', 0)
+        impressions += region_data.get('impressions', 0)
+    return spend, impressions
+
+def unpack_demographics(row_val):
+    """Return (total_spend, total_impressions, top_demo_by_spend)"""
+    try:
+        parsed = parse_nested_dict(row_val)
+    except:
+        return 0, 0, None
+    spend, impressions = 0, 0
+    top_demo = None
+    max_spend = 0
+    for demo, metrics in parsed.items():
+        s = metrics.get('spend', 0)
+        i = metrics.get('impressions', 0)
+        spend += s
+        impressions += i
+        if s > max_spend:
+            max_spend = s
+            top_demo = demo
+    return spend, impressions, top_demo
+
+# Columns of the dataset being analyzed. The pool is forked after this is
+# filled, so workers read their own copy instead of having columns pickled
+DATASET_COLUMNS = {}
+
+def analyze_named_column(col_name):
+    """Pool worker: analyze one column of DATASET_COLUMNS by name"""
+    return BasicDataAnalyzer().look_at_one_column(DATASET_COLUMNS[col_name], col_name)
+
+def to_plain_json(value):
+    """Turn NaN/inf into None, the way orjson writes them"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: to_plain_json(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain_json(val) for val in value]
+    return value
+
+def save_json(data, file_name):
+    """Write results as indented JSON, using orjson when it's installed"""
+    if orjson is not None:
+        with open(file_name, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(file_name, 'w') as f:
+            json.dump(to_plain_json(data), f, indent=2)
+
 class BasicDataAnalyzer:
     def __init__(self):
         self.my_data = {}
 
+    def rows_to_columns(self, header, rows):
+        """Turn parsed rows (lists of fields) into {column name: list of values}"""
+        # pad short rows with '' like DictReader did; extra fields are ignored
+        for row in rows:
+            if len(row) < len(header):
+                row.extend([''] * (len(header) - len(row)))
+        return {col: list(values) for col, values in zip(header, zip(*rows))}
+
+    def split_plain_csv(self, text):
+        """Columns from CSV text that has no quoted fields, using plain str.split"""
+        # split on '\n' only: splitlines() would also break on form feeds and
+        # other separators that csv keeps inside a field
+        lines = [line[:-1] if line.endswith('\r') else line for line in text.split('\n')]
+        lines = [line for line in lines if line]
+        if len(lines) < 2:
+            return {}
+        return self.rows_to_columns(lines[0].split(','), [line.split(',') for line in lines[1:]])
+
     def read_csv_file(self, file_name):
-        rows = []
+        """Read a CSV into {column name: list of values}, or {} if it has no data"""
         try:
-            with open(file_name, 'r', encoding='utf-8') as f:
-                csv_reader = csv.DictReader(f)
-                for row in csv_reader:
-                    rows.append(row)
+            if os.path.getsize(file_name) == 0:
+                return {}
+            with open(file_name, 'rb') as raw_file:
+                with mmap.mmap(raw_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    # with no quote characters every comma and newline is a real
+                    # separator, so the file can be split without the csv module
+                    if mapped.find(b'"') == -1:
+                        # decode straight from the mapping, without copying it to bytes first
+                        with memoryview(mapped) as view:
+                            return self.split_plain_csv(str(view, 'utf-8'))
+
+            # plain csv.reader rows are lists, so no dict is built per row
+            with open(file_name, 'r', encoding='utf-8', newline='', buffering=READ_BUFFER_SIZE) as f:
+                csv_reader = csv.reader(f)
+                header = next(csv_reader, [])
+                rows = [row for row in csv_reader if row]
         except FileNotFoundError:
             print(f"Oops! Can't find {file_name}")
-            return []
-        return rows
-
-    def check_if_number(self, text):
-        if not text or text.strip() == '':
-            return False
-        try:
-            float(text)
-            return True
-        except ValueError:
-            return False
-
-    def make_float(self, text):
-        try:
-            return float(text)
-        except (ValueError, TypeError):
-            return 0.0
+            return {}
+        return self.rows_to_columns(header, rows) if header and rows else {}
 
     def get_average(self, numbers):
         if not numbers:
             return 0.0
-        return sum(numbers) / len(numbers)
+        # fmean sums with fsum, so big columns don't lose precision
+        return fmean(numbers)
 
-    def get_std_dev(self, numbers):
-        if len(numbers) < 2:
+    def get_std_dev(self, numbers, avg=None):
+        count = len(numbers)
+        if count < 2:
             return 0.0
-        avg = self.get_average(numbers)
-        squared_diffs = [(x - avg) ** 2 for x in numbers]
-        variance = sum(squared_diffs) / (len(numbers) - 1)
+        # squared differences from the mean, summed without building a list;
+        # subtracting the mean first keeps large values with a small spread exact
+        if avg is None:
+            avg = math.fsum(numbers) / count
+        variance = math.fsum((x - avg) ** 2 for x in numbers) / (count - 1)
         return math.sqrt(variance)
 
-    def unpack_delivery_by_region(self, row_val):
-        try:
-            parsed = ast.literal_eval(row_val)
-        except:
-            return {'total_spend': 0, 'total_impressions': 0}
-        spend, impressions = 0, 0
-        for region_data in parsed.values():
-            spend += region_data.get('spend', 0)
-            impressions += region_data.get('impressions', 0)
-        return {'total_spend': spend, 'total_impressions': impressions}
-
-    def unpack_demographics(self, row_val):
-        try:
-            parsed = ast.literal_eval(row_val)
-        except:
-            return {'total_spend': 0, 'total_impressions': 0, 'top_demo_by_spend': None}
-        spend, impressions = 0, 0
-        top_demo = None
-        max_spend = 0
-        for demo, metrics in parsed.items():
-            s = metrics.get('spend', 0)
-            i = metrics.get('impressions', 0)
-            spend += s
-            impressions += i
-            if s > max_spend:
-                max_spend = s
-                top_demo = demo
-        return {
-            'total_spend': spend,
-            'total_impressions': impressions,
-            'top_demo_by_spend': top_demo
-        }
+    def get_number_stats(self, numbers):
+        """Average, min, max and spread of a non-empty list, summing it only once"""
+        avg = self.get_average(numbers)
+        return avg, min(numbers), max(numbers), self.get_std_dev(numbers, avg)
 
-    def look_at_one_column(self, data_rows, col_name):
-        all_values = [row.get(col_name, '') for row in data_rows]
-        real_values = [v for v in all_values if v.strip() != '']
+    def get_number_list(self, value_counts, has_data):
+        """Floats of a mostly-numeric column (each repeated by its count), or None for text"""
+        # parse each distinct value once; float() already copes with surrounding spaces
+        try:
+            # an all-numeric column converts in a single map() with no exception handling
+            distinct_numbers = list(map(float, value_counts))
+        except ValueError:
+            pass
+        else:
+            number_list = []
+            for num, count in zip(distinct_numbers, value_counts.values()):
+                number_list.extend([num] * count)
+            return number_list
+
+        number_list = []
+        not_numbers = 0
+        for val, count in value_counts.items():
+            try:
+                number_list.extend([float(val)] * count)
+            except ValueError:
+                not_numbers += count
+                # half the values are text already, so it can't be a numeric column
+                if not_numbers >= has_data / 2:
+                    return None
+        return number_list
+
+    def look_at_one_column(self, all_values, col_name):
+        """Return (summary for the JSON, sample values that are only printed)"""
+        # count every value in one pass, then drop the blank ones; the checks
+        # below only have to look at each distinct value once
+        value_counts = Counter(all_values)
+        blank_values = [v for v in value_counts if v.strip() == '']
+        missing = sum(value_counts.pop(v) for v in blank_values)
 
         basic_info = {
             'name': col_name,
-            'total_rows': len(data_rows),
-            'has_data': len(real_values),
-            'missing_data': len(data_rows) - len(real_values)
+            'total_rows': len(all_values),
+            'has_data': len(all_values) - missing,
+            'missing_data': missing
         }
+        samples = {}
 
+        # nested-dict columns: unpack each distinct string once, then total each
+        # field column-wise with sum()/map(), weighted by how often it appears
+        counts = value_counts.values()
         if col_name == 'delivery_by_region':
-            unpacked = [self.unpack_delivery_by_region(val) for val in real_values]
-            total_spend = sum([u['total_spend'] for u in unpacked])
-            total_impressions = sum([u['total_impressions'] for u in unpacked])
+            unpacked = list(map(unpack_delivery_by_region, value_counts))
+            spends, impressions = zip(*unpacked) if unpacked else ((), ())
             basic_info.update({
                 'data_type': 'nested_dict',
-                'total_spend': total_spend,
-                'total_impressions': total_impressions
+                'total_spend': sum(map(mul, spends, counts)),
+                'total_impressions': sum(map(mul, impressions, counts))
             })
         elif col_name == 'demographic_distribution':
-            unpacked = [self.unpack_demographics(val) for val in real_values]
-            total_spend = sum([u['total_spend'] for u in unpacked])
-            total_impressions = sum([u['total_impressions'] for u in unpacked])
-            top_demos = Counter([u['top_demo_by_spend'] for u in unpacked if u['top_demo_by_spend']])
+            unpacked = list(map(unpack_demographics, value_counts))
+            spends, impressions, top_demo_list = zip(*unpacked) if unpacked else ((), (), ())
+            top_demos = Counter()
+            for top_demo, count in zip(top_demo_list, counts):
+                if top_demo:
+                    top_demos[top_demo] += count
             basic_info.update({
                 'data_type': 'nested_dict',
-                'total_spend': total_spend,
-                'total_impressions': total_impressions,
+                'total_spend': sum(map(mul, spends, counts)),
+                'total_impressions': sum(map(mul, impressions, counts)),
                 'most_targeted_demo': top_demos.most_common(1)
             })
         else:
-            number_list = []
-            for val in real_values:
-                if self.check_if_number(val):
-                    number_list.append(self.make_float(val))
+            number_list = self.get_number_list(value_counts, basic_info['has_data'])
 
-            if len(number_list) > 0 and len(number_list) / len(real_values) > 0.5:
+            if number_list and len(number_list) / basic_info['has_data'] > 0.5:
+                average, smallest, biggest, spread = self.get_number_stats(number_list)
                 basic_info.update({
                     'data_type': 'numbers',
-                    'average': self.get_average(number_list),
-                    'smallest': min(number_list) if number_list else None,
-                    'biggest': max(number_list) if number_list else None,
-                    'spread': self.get_std_dev(number_list)
+                    'average': average,
+                    'smallest': smallest,
+                    'biggest': biggest,
+                    'spread': spread
                 })
             else:
-                word_counter = Counter(real_values)
                 basic_info.update({
                     'data_type': 'text',
-                    'different_values': len(word_counter),
-                    'most_common': word_counter.most_common(5),
-                    'sample_values': list(word_counter.keys())[:10]
+                    'different_values': len(value_counts)
                 })
+                samples = {
+                    'most_common': value_counts.most_common(5),
+                    'sample_values': list(islice(value_counts, 10))
+                }
 
-        return basic_info
+        return basic_info, samples
 
-    def analyze_whole_dataset(self, data_rows, name):
-        if not data_rows:
+    def analyze_whole_dataset(self, columns, name):
+        if not columns:
             return {'error': 'No data found!'}
 
         start = time.time()
 
         dataset_info = {
             'name': name,
-            'num_rows': len(data_rows),
-            'num_columns': len(data_rows[0].keys()) if data_rows else 0,
-            'column_names': list(data_rows[0].keys()) if data_rows else []
+            'num_rows': len(next(iter(columns.values()))),
+            'num_columns': len(columns),
+            'column_names': list(columns.keys())
         }
 
+        # columns don't depend on each other, so analyze them in parallel when
+        # there are spare CPUs and workers can be forked with the data in place;
+        # only column names and results cross between processes
+        col_names = dataset_info['column_names']
+        use_pool = ((os.cpu_count() or 1) > 1 and len(col_names) > 1
+                    and 'fork' in multiprocessing.get_all_start_methods())
+        if use_pool:
+            DATASET_COLUMNS.update(columns)
+            try:
+                with ProcessPoolExecutor(mp_context=multiprocessing.get_context('fork')) as pool:
+                    col_results = list(pool.map(analyze_named_column, col_names))
+            finally:
+                DATASET_COLUMNS.clear()
+        else:
+            col_results = [self.look_at_one_column(columns[col], col) for col in col_names]
+
         column_info = {}
-        for col in dataset_info['column_names']:
-            column_info[col] = self.look_at_one_column(data_rows, col)
+        column_samples = {}
+        for col, (info, samples) in zip(col_names, col_results):
+            column_info[col] = info
+            if samples:
+                column_samples[col] = samples
 
         end = time.time()
 
         return {
             'dataset_info': dataset_info,
             'column_info': column_info,
+            'column_samples': column_samples,
             'time_taken': end - start
         }
 
-    def group_data_by(self, data_rows, group_by_cols):
-        if not data_rows or not group_by_cols:
+    def group_data_by(self, columns, group_by_cols):
+        if not columns or not group_by_cols:
             return {}
 
-        my_groups = defaultdict(list)
-        for row in data_rows:
-            key = tuple(row.get(col, '') for col in group_by_cols)
-            my_groups[key].append(row)
+        num_rows = len(next(iter(columns.values())))
+        key_columns = [columns.get(col) or [''] * num_rows for col in group_by_cols]
+
+        # only the group sizes are reported, so count keys instead of collecting rows;
+        # a single key column is counted directly, without a tuple per row
+        if len(key_columns) == 1:
+            group_sizes = {(key,): size for key, size in Counter(key_columns[0]).items()}
+        else:
+            group_sizes = Counter(zip(*key_columns))
 
         group_results = {}
-        for key, group_rows in my_groups.items():
+        for key, size in group_sizes.items():
             key_name = '_'.join(str(k) for k in key)
             group_results[key_name] = {
-                'size': len(group_rows),
+                'size': size,
                 'values': dict(zip(group_by_cols, key))
             }
 
         return {
-            'total_groups': len(my_groups),
+            'total_groups': len(group_sizes),
             'group_details': group_results,
-            'avg_group_size': sum(len(g) for g in my_groups.values()) / len(my_groups)
+            'avg_group_size': num_rows / len(group_sizes)
         }
 
     def show_results(self, results):
-        print(f"\n{'='*50}")
-        print(f"ANALYZING: {results['dataset_info']['name']}")
-        print(f"{'='*50}")
-        print(f"Rows: {results['dataset_info']['num_rows']:,}")
-        print(f"Columns: {results['dataset_info']['num_columns']}")
-        print(f"Time: {results['time_taken']:.2f} seconds")
+        # build the whole report first and write it out in one go
+        report = io.StringIO()
 
-        print(f"\n{'Looking at each column':^50}")
-        print("-" * 50)
+        print(f"\n{'='*50}", file=report)
+        print(f"ANALYZING: {results['dataset_info']['name']}", file=report)
+        print(f"{'='*50}", file=report)
+        print(f"Rows: {results['dataset_info']['num_rows']:,}", file=report)
+        print(f"Columns: {results['dataset_info']['num_columns']}", file=report)
+        print(f"Time: {results['time_taken']:.2f} seconds", file=report)
+
+        print(f"\n{'Looking at each column':^50}", file=report)
+        print("-" * 50, file=report)
 
         for col_name, info in results['column_info'].items():
-            print(f"\nColumn: {col_name}")
-            print(f"  Type: {info['data_type']}")
-            print(f"  Total: {info['total_rows']:,}")
-            print(f"  Has data: {info['has_data']:,}")
-            print(f"  Missing: {info['missing_data']:,}")
+            print(f"\nColumn: {col_name}", file=report)
+            print(f"  Type: {info['data_type']}", file=report)
+            print(f"  Total: {info['total_rows']:,}", file=report)
+            print(f"  Has data: {info['has_data']:,}", file=report)
+            print(f"  Missing: {info['missing_data']:,}", file=report)
 
             if info['data_type'] == 'numbers':
-                print(f"  Average: {info['average']:.2f}")
-                print(f"  Min: {info['smallest']}")
-                print(f"  Max: {info['biggest']}")
-                print(f"  Spread: {info['spread']:.2f}")
+                print(f"  Average: {info['average']:.2f}", file=report)
+                print(f"  Min: {info['smallest']}", file=report)
+                print(f"  Max: {info['biggest']}", file=report)
+                print(f"  Spread: {info['spread']:.2f}", file=report)
             elif info['data_type'] == 'nested_dict':
-                print(f"  Total Spend: {info['total_spend']}")
-                print(f"  Total Impressions: {info['total_impressions']}")
+                print(f"  Total Spend: {info['total_spend']}", file=report)
+                print(f"  Total Impressions: {info['total_impressions']}", file=report)
                 if 'most_targeted_demo' in info:
-                    print(f"  Most Targeted Demo: {info['most_targeted_demo']}")
+                    print(f"  Most Targeted Demo: {info['most_targeted_demo']}", file=report)
             else:
-                print(f"  Different values: {info['different_values']:,}")
-                print(f"  Most common: {info['most_common'][:3]}")
+                print(f"  Different values: {info['different_values']:,}", file=report)
+                print(f"  Most common: {results['column_samples'][col_name]['most_common'][:3]}", file=report)
+
+        sys.stdout.write(report.getvalue())
 
 def main():
     my_analyzer = BasicDataAnalyzer()
@@ -251,19 +391,14 @@ def main():
                 print(f"Unique page-ad combos: {ad_groups.get('total_groups', 0)}")
                 print(f"Average size: {ad_groups.get('avg_group_size', 0):.1f}")
 
-    with open('basic_python_results.json', 'w') as f:
-        json_data = {}
-        for dataset, results in all_results.items():
-            json_data[dataset] = {
-                'dataset_info': results['dataset_info'],
-                'time_taken': results['time_taken'],
-                'column_summary': {
-                    col: {k: v for k, v in info.items() 
-                          if k not in ['sample_values', 'most_common']}
-                    for col, info in results['column_info'].items()
-                }
-            }
-        json.dump(json_data, f, indent=2)
+    json_data = {}
+    for dataset, results in all_results.items():
+        json_data[dataset] = {
+            'dataset_info': results['dataset_info'],
+            'time_taken': results['time_taken'],
+            'column_summary': results['column_info']
+        }
+    save_json(json_data, 'basic_python_results.json')
 
     print(f"\n{'='*50}")
     print("All done! Results saved to basic_python_results.json")